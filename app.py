@@ -12,21 +12,25 @@ import io
 import base64
 from base64 import b64encode
 from datetime import datetime
+from functools import lru_cache
 import math
-import requests
 from flask import Flask
-import pandas as pd
 import dash
 from dash.dependencies import Input, Output, State
 import dash_core_components as dcc
 import dash_bootstrap_components as dbc
 import dash_html_components as html
-import plotly.express as px
+
+# pandas and plotly.express are imported inside the callbacks that use them so that
+# serving the layout does not pay for them; warm_up() loads them ahead of time.
 
 buffer = io.StringIO()
 
 mountain_logo = "assets/mountain.png"
 
+default_opacity = 0.7
+default_max_marker = 18
+
 # app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 
 def parse_contents(contents, filename, date):
@@ -36,6 +40,8 @@ def parse_contents(contents, filename, date):
                            filename,
                            date, date when file was last saved
     """
+    import pandas as pd
+
     content_type, content_string = contents.split(',')
     decoded = base64.b64decode(content_string)
     
@@ -54,6 +60,60 @@ def parse_contents(contents, filename, date):
 
     return df
 
+@lru_cache(maxsize=64)
+def template_figure(example, marker_size_input, opacity_input, fixed_marker_size):
+    """
+        function for building the "Iris" figure shown when no data is plotted
+        input parameters : example, True for the titled example plot, False for the placeholder
+                           marker_size_input, max. marker size
+                           opacity_input, marker opacity
+                           fixed_marker_size, True to size markers from marker_size_input only
+        the figure is cached and shared between callbacks, so it must not be modified
+    """
+    import plotly.express as px
+
+    df = px.data.iris()
+    if example:
+        trace_data = px.scatter_3d(df,
+                            x = 'sepal_length',
+                            y = 'sepal_width',
+                            z = 'petal_width',
+                            color='petal_length', 
+                            size='petal_length', 
+                            title='Example Plot using "Iris" Dataset',
+                            symbol='species', 
+                            size_max=marker_size_input,
+                            opacity=opacity_input
+        )
+    else:
+        trace_data = px.scatter_3d(df,
+                            x = None, #'sepal_length',
+                            y = None, #'sepal_width',
+                            z = None, #'petal_width',
+                            color='petal_length', 
+                            size='petal_length', 
+                            #title='Example Plot using "Iris" Dataset',
+                            symbol='species', 
+                            size_max=marker_size_input,
+                            opacity=opacity_input
+        )
+
+    # tight layout
+    trace_data.update_layout(margin=dict(l=40, r=30, b=30, t=40), 
+                            coloraxis_colorbar=dict(yanchor="top", y=1, x=0,
+                                    ticks="outside",
+                            ),
+                            title=dict(x=0.5),
+                            title_font_color = 'blue',
+                            title_font=dict(size=24),
+                            font_color = 'blue'
+    )
+
+    if fixed_marker_size:
+        trace_data.update_traces(marker=dict(size=marker_size_input/3.6))
+
+    return trace_data
+
 server = Flask(__name__)
 server.secret_key = "CogarDD"
 
@@ -276,7 +336,7 @@ functionality = dbc.Row(
                 ),
                 dbc.Row(
                     dbc.Col(
-                        dcc.Slider(id = 'opacity', min=0, max=1, updatemode='mouseup', step=0.1, marks={0:'0.0',0.2:'0.2',0.4:'0.4',0.6:'0.6',0.8:'0.8',1:'1.0'}, value=0.7),
+                        dcc.Slider(id = 'opacity', min=0, max=1, updatemode='mouseup', step=0.1, marks={0:'0.0',0.2:'0.2',0.4:'0.4',0.6:'0.6',0.8:'0.8',1:'1.0'}, value=default_opacity),
                     ),
                     className = 'pb-3 pr-5 pl-4'
                 ),
@@ -289,7 +349,7 @@ functionality = dbc.Row(
                 ),
                 dbc.Row(
                     dbc.Col(
-                        dcc.Slider(id = 'max_marker', min=0, updatemode='mouseup', max=50, step=1, marks={0:'0',10:'10',20:'20',30:'30',40:'40',50:'50'}, value=18),
+                        dcc.Slider(id = 'max_marker', min=0, updatemode='mouseup', max=50, step=1, marks={0:'0',10:'10',20:'20',30:'30',40:'40',50:'50'}, value=default_max_marker),
                     ),
                     className = 'pb-5 pr-5 pl-4'
                 ),
@@ -384,7 +444,9 @@ def update_nclick(value,valueind):
 def update_output(contents, name, date):
 
     """ Callback for getting input file information and load dataframe """
-    
+
+    import pandas as pd
+
     if contents:
         
         df = parse_contents(contents, name, date)
@@ -418,6 +480,8 @@ def update_output(contents, name, date):
                Input('select-x','value')])
 def set_y(jsonified_df, label):
 
+    import pandas as pd
+
     if jsonified_df != None:
         dff = pd.read_json(jsonified_df)
         features = list(dff.columns)
@@ -436,6 +500,8 @@ def set_y(jsonified_df, label):
                Input('select-x','value')])
 def set_z(jsonified_df, label_y, label_x):
 
+    import pandas as pd
+
     if jsonified_df != None:
         dff = pd.read_json(jsonified_df)
         features = list(dff.columns)
@@ -461,6 +527,8 @@ def set_z(jsonified_df, label_y, label_x):
               [Input("hidden-df", "children")])
 def symbol_dim(jsonified_df):
 
+    import pandas as pd
+
     if jsonified_df != None:
         dff = pd.read_json(jsonified_df)
         features = list(dff.columns)
@@ -473,6 +541,8 @@ def symbol_dim(jsonified_df):
               [Input("hidden-df", "children")])
 def color_dim(jsonified_df):
 
+    import pandas as pd
+
     if jsonified_df != None:
         dff = pd.read_json(jsonified_df)
         features = list(dff.columns)
@@ -485,6 +555,8 @@ def color_dim(jsonified_df):
               [Input("hidden-df", "children")])
 def marker_dim(jsonified_df):
 
+    import pandas as pd
+
     if jsonified_df != None:
         dff = pd.read_json(jsonified_df)
         features = list(dff.columns)
@@ -510,6 +582,9 @@ def marker_dim(jsonified_df):
                Input('html-object', 'n_clicks')])
 def plot_graph(example, jsonified_df, x_var, y_var, z_var, symbol_var, color_var, marker_var, file_name, marker_size_input, opacity_input, downloaded):
 
+    import pandas as pd
+    import plotly.express as px
+
     buffer = io.StringIO()
 
     if (x_var and y_var and z_var):
@@ -544,29 +619,7 @@ def plot_graph(example, jsonified_df, x_var, y_var, z_var, symbol_var, color_var
         df_final = df_select.dropna()
 
         if df_final.shape[0] == 0:
-            df = px.data.iris()
-            trace_data = px.scatter_3d(df,
-                            x = None, #'sepal_length',
-                            y = None, #'sepal_width',
-                            z = None, #'petal_width',
-                            color='petal_length', 
-                            size='petal_length', 
-                            #title='Example Plot using "Iris" Dataset',
-                            symbol='species', 
-                            size_max=marker_size_input,
-                            opacity=opacity_input
-            )
-
-            # tight layout
-            trace_data.update_layout(margin=dict(l=40, r=30, b=30, t=40), 
-                            coloraxis_colorbar=dict(yanchor="top", y=1, x=0,
-                                    ticks="outside",
-                            ),
-                            title=dict(x=0.5),
-                            title_font_color = 'blue',
-                            title_font=dict(size=24),
-                            font_color = 'blue'                                      
-            )
+            trace_data = template_figure(False, marker_size_input, opacity_input, marker_var == None)
         else:
             trace_data = px.scatter_3d(df_final, 
                                     x = x_var,
@@ -586,8 +639,8 @@ def plot_graph(example, jsonified_df, x_var, y_var, z_var, symbol_var, color_var
                                             )
             )
 
-        if marker_var == None:
-            trace_data.update_traces(marker=dict(size=marker_size_input/3.6))
+            if marker_var == None:
+                trace_data.update_traces(marker=dict(size=marker_size_input/3.6))
 
         trace_data.write_html(buffer)
         html_bytes = buffer.getvalue().encode()
@@ -596,32 +649,7 @@ def plot_graph(example, jsonified_df, x_var, y_var, z_var, symbol_var, color_var
         return trace_data, 'Toggle Example On', 'data:text/html;base64,' + encoded
 
     elif example != 0 and example % 2 == 1:
-        df = px.data.iris()
-        trace_data = px.scatter_3d(df,
-                            x = 'sepal_length',
-                            y = 'sepal_width',
-                            z = 'petal_width',
-                            color='petal_length', 
-                            size='petal_length', 
-                            title='Example Plot using "Iris" Dataset',
-                            symbol='species', 
-                            size_max=marker_size_input,
-                            opacity=opacity_input
-        )
-
-        # tight layout
-        trace_data.update_layout(margin=dict(l=40, r=30, b=30, t=40), 
-                                coloraxis_colorbar=dict(yanchor="top", y=1, x=0,
-                                        ticks="outside",
-                                ),
-                                title=dict(x=0.5),
-                                title_font_color = 'blue',
-                                title_font=dict(size=24),
-                                font_color = 'blue'
-        )
-
-        if marker_var == None:
-            trace_data.update_traces(marker=dict(size=marker_size_input/3.6))
+        trace_data = template_figure(True, marker_size_input, opacity_input, marker_var == None)
 
         trace_data.write_html(buffer)
         html_bytes = buffer.getvalue().encode()
@@ -630,31 +658,23 @@ def plot_graph(example, jsonified_df, x_var, y_var, z_var, symbol_var, color_var
         return trace_data, 'Toggle Example Off', 'data:text/html;base64,' + encoded
 
     else:
-        df = px.data.iris()
-        trace_data = px.scatter_3d(df,
-                            x = None, #'sepal_length',
-                            y = None, #'sepal_width',
-                            z = None, #'petal_width',
-                            color='petal_length', 
-                            size='petal_length', 
-                            #title='Example Plot using "Iris" Dataset',
-                            symbol='species', 
-                            size_max=marker_size_input,
-                            opacity=opacity_input
-        )
-
-        # tight layout
-        trace_data.update_layout(margin=dict(l=40, r=30, b=30, t=40), 
-                                coloraxis_colorbar=dict(yanchor="top", y=1, x=0,
-                                        ticks="outside",
-                                ),
-                                title=dict(x=0.5),
-                                title_font_color = 'blue',
-                                title_font=dict(size=24),
-                                font_color = 'blue'                                      
-        )
+        trace_data = template_figure(False, marker_size_input, opacity_input, False)
         
         return trace_data, 'Toggle Example On', None
 
+def warm_up():
+    """
+        function for loading the plotting libraries, serving the layout once and building
+        the template figures for the default slider values; called from the gunicorn master
+        (see gunicorn.conf.py) so that forked workers share the result copy-on-write
+    """
+    import pandas
+    import plotly.express
+
+    server.test_client().get('/')
+    server.test_client().get('/_dash-layout')
+    template_figure(False, default_max_marker, default_opacity, False)
+    template_figure(True, default_max_marker, default_opacity, True)
+
 if __name__ == "__main__":
     app.run_server(debug=True)
\ No newline at end of file
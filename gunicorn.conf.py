@@ -0,0 +1,12 @@
+# Gunicorn configuration, picked up automatically from the working directory.
+#
+# The app is loaded once in the master and warmed up before the workers are
+# forked, so the imported libraries, layout and template figures are shared
+# copy-on-write instead of being rebuilt in every worker.
+
+preload_app = True
+
+def on_starting(server):
+    if server.cfg.preload_app:
+        import app
+        app.warm_up()